@@ -15,39 +15,46 @@ from . import db
 console = Console()
 
 
-def print_category_distribution(conn) -> None:
-    rows = db.get_category_counts(conn)
+def _render_category_distribution(rows: Iterable) -> None:
     table = Table(title="Category distribution")
     table.add_column("Category", style="bold")
     table.add_column("Count", justify="right")
 
+    add_row = table.add_row
     for row in rows:
-        table.add_row(str(row["category"]), str(row["count"]))
+        category, count = row["category"], row["count"]
+        add_row(str(category), str(count))
 
     console.print(table)
 
 
-def print_category_distribution_by_month(conn) -> None:
-    rows = db.get_category_counts_by_month(conn)
+def _render_category_distribution_by_month(rows: Iterable) -> None:
     table = Table(title="Category distribution by month")
     table.add_column("Year-Month", style="bold")
     table.add_column("Category")
     table.add_column("Count", justify="right")
 
+    add_row = table.add_row
     for row in rows:
-        year_month = row["year_month"] or "unknown"
-        table.add_row(year_month, str(row["category"]), str(row["count"]))
+        year_month, category, count = row["year_month"], row["category"], row["count"]
+        add_row(year_month or "unknown", str(category), str(count))
 
     console.print(table)
 
 
+def print_category_distribution(conn) -> None:
+    _render_category_distribution(db.get_category_counts(conn))
+
+
+def print_category_distribution_by_month(conn) -> None:
+    _render_category_distribution_by_month(db.get_category_counts_by_month(conn))
+
+
 def run_basic_analysis(conn) -> None:
     """
     Basic analysis entry point: prints category counts and distribution over time.
     This is where more advanced manifold / rhetoric analysis can be added later.
     """
-    print_category_distribution(conn)
-    print_category_distribution_by_month(conn)
-
-
-
+    rows = db.get_category_count_summary(conn)
+    _render_category_distribution(row for row in rows if row["section"] == 0)
+    _render_category_distribution_by_month(row for row in rows if row["section"] == 1)
@@ -5,15 +5,23 @@ Transcript classification into fixed categories using Pydantic AI.
 """
 
 import asyncio
+import hashlib
+import random
 from typing import Literal
 
 from pydantic import BaseModel, Field
+from pydantic_ai import Agent
+from pydantic_ai.exceptions import ModelHTTPError
+from rich.console import Console
 
 from .config import Settings
 from . import db
-from .llm import build_agent, describe_model
+from .llm import build_agent, build_http_client, describe_model
+from .semantic_cache import EMBED_CHARS, SemanticCache
 
 
+console = Console()
+
 CATEGORIES = [
     "politics",
     "entertainment",
@@ -24,7 +32,10 @@ CATEGORIES = [
 ]
 
 
-CategoryLiteral = Literal["politics", "entertainment", "economics", "society", "culture", "others"]
+CATEGORY_SET: frozenset[str] = frozenset(CATEGORIES)
+
+# Built from CATEGORIES so the allowed labels have a single source of truth.
+CategoryLiteral = Literal[tuple(CATEGORIES)]
 
 
 class ClassificationResult(BaseModel):
@@ -36,57 +47,176 @@ class ClassificationResult(BaseModel):
     )
 
 
-SYSTEM_PROMPT = """
+_CATEGORY_BULLETS = "\n".join(f"- {category}" for category in CATEGORIES)
+
+SYSTEM_PROMPT = f"""
 You classify YouTube talk show episodes into one overall topic category.
 
 Use ONLY one of these categories:
-- politics
-- entertainment
-- economics
-- society
-- culture
-- others
+{_CATEGORY_BULLETS}
 
 Respond with a single category and a short rationale.
 """
 
 
+def _truncate_transcript(text: str, max_chars: int) -> str:
+    """
+    Keep the head and tail of long transcripts; the overall topic is
+    recoverable from a fraction of a full episode.
+    """
+    if len(text) <= max_chars:
+        return text
+    head = max_chars * 2 // 3
+    tail = max_chars - head
+    return f"{text[:head]}\n... [truncated] ...\n{text[-tail:]}"
+
+
+def _build_prompt(row, transcript_text: str) -> str:
+    return (
+        "You will receive the transcript of a talk show episode.\n"
+        "Decide which ONE category from the allowed set best captures the overall topic.\n\n"
+        f"Video title: {row['title']}\n"
+        f"YouTube ID: {row['youtube_id']}\n\n"
+        f"Transcript:\n{transcript_text}\n"
+    )
+
+
+async def _run_with_retry(agent: Agent, prompt: str, max_retries: int = 3):
+    """
+    Run the agent, retrying with exponential backoff on HTTP 429 (rate limit).
+    """
+    for attempt in range(max_retries):
+        try:
+            return await agent.run(prompt)
+        except ModelHTTPError as e:
+            if e.status_code != 429 or attempt == max_retries - 1:
+                raise
+            # Exponential backoff: 2^attempt seconds, with jitter
+            await asyncio.sleep((2 ** attempt) + random.uniform(0, 1))
+
+
+async def _sem_run(sem: asyncio.Semaphore, agent: Agent, prompt: str):
+    async with sem:
+        return await _run_with_retry(agent, prompt)
+
+
+def _cache_key(model_name: str, transcript_text: str) -> str:
+    return hashlib.sha256(f"{model_name}|{transcript_text}".encode("utf-8")).hexdigest()
+
+
 async def _classify_unclassified_transcripts_async(settings: Settings, conn) -> int:
     """
     Async helper to run the classifier over any transcripts that do not have a saved classification.
+
+    Transcripts are cut to `settings.max_transcript_chars` before prompting.
+    Transcripts whose exact text was already classified by the same model are
+    served from the `llm_cache` table, and identical transcripts within one run
+    share a single LLM call; with `settings.semantic_cache` enabled,
+    transcripts similar enough to an earlier one reuse its label too. The
+    remaining LLM calls are issued concurrently, with at most
+    `settings.llm_concurrency` requests in flight. Transcripts whose LLM call
+    fails are reported and left unclassified for the next run.
     """
-    agent = build_agent(settings, ClassificationResult, system_prompt=SYSTEM_PROMPT)
     model_name = describe_model(settings)
 
-    classified_count = 0
+    semantic = None
+    if settings.semantic_cache:
+        semantic = SemanticCache(conn, model_name, settings.semantic_cache_threshold)
+
+    # Only ids and (truncated) prompts are retained, not full transcript rows.
+    labelled: list[tuple[int, ClassificationResult]] = []
+    # (video_id, cache key, prompt, transcript opening for the semantic cache),
+    # one per distinct cache key.
+    misses: list[tuple[int, str, str, str | None]] = []
+    # Further videos whose transcript shares a miss's cache key; they reuse the
+    # label of that miss instead of sending an identical prompt.
+    same_key: dict[str, list[int]] = {}
 
     for row in db.iter_unclassified_transcripts(conn):
-        video_title = row["title"]
-        youtube_id = row["youtube_id"]
-        transcript_text = row["text"]
         video_id = int(row["video_id"])
-
-        prompt = (
-            "You will receive the transcript of a talk show episode.\n"
-            "Decide which ONE category from the allowed set best captures the overall topic.\n\n"
-            f"Video title: {video_title}\n"
-            f"YouTube ID: {youtube_id}\n\n"
-            f"Transcript:\n{transcript_text}\n"
+        transcript_text = _truncate_transcript(row["text"], settings.max_transcript_chars)
+        key = _cache_key(model_name, transcript_text)
+        cached = db.get_cached_classification(conn, key)
+        # A cached label outside the current category set is stale: re-classify.
+        if cached is not None and cached["category"] in CATEGORY_SET:
+            # Set membership is the only check needed; skip full model validation.
+            data = ClassificationResult.model_construct(
+                category=cached["category"],
+                rationale=cached["rationale"],
+            )
+            labelled.append((video_id, data))
+        elif key in same_key:
+            same_key[key].append(video_id)
+        else:
+            same_key[key] = []
+            opening = row["text"][:EMBED_CHARS] if semantic is not None else None
+            misses.append((video_id, key, _build_prompt(row, transcript_text), opening))
+
+    embeddings: list = [None] * len(misses)
+    if semantic is not None and misses:
+        miss_embeddings = semantic.embed([opening for *_, opening in misses])
+        remaining = []
+        embeddings = []
+        for miss, embedding, hit in zip(misses, miss_embeddings, semantic.match(miss_embeddings)):
+            if hit is not None and hit[0] in CATEGORY_SET:
+                data = ClassificationResult.model_construct(category=hit[0], rationale=hit[1])
+                labelled.extend((video_id, data) for video_id in (miss[0], *same_key[miss[1]]))
+            else:
+                remaining.append(miss)
+                embeddings.append(embedding)
+        misses = remaining
+
+    sem = asyncio.Semaphore(settings.llm_concurrency)
+    async with build_http_client(settings) as http_client:
+        agent = build_agent(
+            settings,
+            ClassificationResult,
+            system_prompt=SYSTEM_PROMPT,
+            http_client=http_client,
+        )
+        # One failed call must not discard the results of the others.
+        results = await asyncio.gather(
+            *(_sem_run(sem, agent, prompt) for _, _, prompt, _ in misses),
+            return_exceptions=True,
         )
 
-        result = await agent.run(prompt)
-        data: ClassificationResult = result.output
+    failures = [
+        (key, result)
+        for (_, key, _, _), result in zip(misses, results)
+        if isinstance(result, BaseException)
+    ]
+    if failures:
+        failed = sum(1 + len(same_key[key]) for key, _ in failures)
+        console.print(
+            f"[yellow]{failed} transcript(s) could not be classified and "
+            f"will be retried on the next run. First error: {failures[0][1]!r}[/yellow]"
+        )
 
-        db.store_classification(
-            conn=conn,
-            video_id=video_id,
-            category=data.category,
-            model=model_name,
-            rationale=data.rationale,
+    with conn:
+        now = db.utc_now_iso()
+        for (video_id, key, _, _), embedding, result in zip(misses, embeddings, results):
+            if isinstance(result, BaseException):
+                continue
+            data: ClassificationResult = result.output
+            db.store_cached_classification(
+                conn=conn,
+                key=key,
+                category=data.category,
+                rationale=data.rationale,
+            )
+            if semantic is not None:
+                semantic.store(conn, video_id, embedding, data.category, data.rationale)
+            labelled.extend((shared_id, data) for shared_id in (video_id, *same_key[key]))
+
+        db.store_classifications_bulk(
+            conn,
+            [
+                (video_id, data.category, model_name, data.rationale, now)
+                for video_id, data in labelled
+            ],
         )
-        classified_count += 1
 
-    return classified_count
+    return len(labelled)
 
 
 def classify_unclassified_transcripts(settings: Settings, conn) -> int:
@@ -11,11 +11,9 @@ from rich.console import Console
 
 from .config import Settings
 from .db import open_db
-from .youtube_client import list_channel_videos
-from .transcripts import extract_channel_videos_and_transcripts
-from .classification import classify_unclassified_transcripts
-from .analysis import run_basic_analysis
 
+# Subcommand dependencies (yt_dlp, pydantic_ai, ...) are imported inside each
+# `cmd_*` so a command only pays the import cost of what it actually uses.
 
 console = Console()
 
@@ -38,10 +36,18 @@ def cmd_extract(_: argparse.Namespace) -> None:
     
     By default, extracts the most recent 10 videos. Use --max-videos to change this.
     """
+    from .transcripts import extract_channel_videos_and_transcripts
+    from .youtube_client import list_channel_videos
+
     settings = _load_settings_or_exit()
     console.print(f"[bold]Extracting videos for channel:[/bold] {settings.youtube_channel_url}")
 
-    videos = list_channel_videos(settings.youtube_channel_url, max_videos=10)
+    videos = list_channel_videos(
+        settings.youtube_channel_url,
+        max_videos=10,
+        cookie_file=settings.ytdlp_cookie_file,
+        cache_dir=settings.ytdlp_cache_dir,
+    )
     console.print(f"Discovered {len(videos)} videos on the channel.")
 
     with open_db(settings) as conn:
@@ -54,6 +60,8 @@ def cmd_classify(_: argparse.Namespace) -> None:
     """
     Classification phase: classify transcripts into fixed categories.
     """
+    from .classification import classify_unclassified_transcripts
+
     settings = _load_settings_or_exit()
 
     with open_db(settings) as conn:
@@ -66,6 +74,8 @@ def cmd_analyze(_: argparse.Namespace) -> None:
     """
     Analysis phase: basic category and temporal distribution summaries.
     """
+    from .analysis import run_basic_analysis
+
     settings = _load_settings_or_exit()
 
     with open_db(settings) as conn:
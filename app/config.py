@@ -29,6 +29,11 @@ def load_env() -> None:
         load_dotenv()
 
 
+def _optional_path(value: str | None) -> Path | None:
+    value = (value or "").strip()
+    return Path(value).expanduser() if value else None
+
+
 @dataclass
 class Settings:
     """
@@ -43,6 +48,18 @@ class Settings:
       - OPENAI_MODEL: OpenAI model name (default: "gpt-4o-mini").
       - OPENAI_API_KEY: used when LLM_PROVIDER == "openai".
       - DATABASE_PATH: path to the SQLite database file (default: "youtube_nlp.db").
+      - LLM_CONCURRENCY: max number of in-flight LLM requests while classifying (default: 8).
+      - TRANSCRIPT_WORKERS: number of threads fetching transcripts concurrently (default: 4).
+      - TRANSCRIPT_REQUESTS_PER_SEC: global cap on transcript request starts (default: 1.0).
+      - YTDLP_SLEEP_REQUESTS: seconds yt-dlp sleeps between extraction requests (default: 0.75).
+      - YTDLP_SLEEP_SUBTITLES: seconds to sleep before each subtitle download (default: 1.0).
+      - YTDLP_COOKIE_FILE: Netscape cookie file shared by every yt-dlp call (default: none).
+      - YTDLP_CACHE_DIR: yt-dlp cache for player JS / signature solutions
+        (default: yt-dlp's own, usually ~/.cache/yt-dlp).
+      - MAX_TRANSCRIPT_CHARS: transcript characters sent to the LLM per episode (default: 8000).
+      - SEMANTIC_CACHE: "1" to reuse labels of similar transcripts via embeddings
+        (default: off; needs the `semantic` extra).
+      - SEMANTIC_CACHE_THRESHOLD: minimum cosine similarity for a reuse (default: 0.9).
     """
 
     youtube_channel_url: str
@@ -52,6 +69,16 @@ class Settings:
     openai_model: str = "gpt-4o-mini"
     openai_api_key: str | None = None
     database_path: Path = PROJECT_ROOT / "youtube_nlp.db"
+    llm_concurrency: int = 8
+    transcript_workers: int = 4
+    transcript_requests_per_sec: float = 1.0
+    ytdlp_sleep_requests: float = 0.75
+    ytdlp_sleep_subtitles: float = 1.0
+    ytdlp_cookie_file: Path | None = None
+    ytdlp_cache_dir: Path | None = None
+    max_transcript_chars: int = 8000
+    semantic_cache: bool = False
+    semantic_cache_threshold: float = 0.9
 
     @classmethod
     def from_env(cls) -> "Settings":
@@ -78,6 +105,22 @@ class Settings:
             database_path=Path(
                 os.getenv("DATABASE_PATH", str(PROJECT_ROOT / "youtube_nlp.db"))
             ),
+            llm_concurrency=max(1, int(os.getenv("LLM_CONCURRENCY", "8").strip() or "8")),
+            transcript_workers=max(1, int(os.getenv("TRANSCRIPT_WORKERS", "4").strip() or "4")),
+            transcript_requests_per_sec=max(
+                0.01, float(os.getenv("TRANSCRIPT_REQUESTS_PER_SEC", "1.0").strip() or "1.0")
+            ),
+            ytdlp_sleep_requests=float(os.getenv("YTDLP_SLEEP_REQUESTS", "0.75").strip() or "0.75"),
+            ytdlp_sleep_subtitles=float(os.getenv("YTDLP_SLEEP_SUBTITLES", "1.0").strip() or "1.0"),
+            ytdlp_cookie_file=_optional_path(os.getenv("YTDLP_COOKIE_FILE")),
+            ytdlp_cache_dir=_optional_path(os.getenv("YTDLP_CACHE_DIR")),
+            max_transcript_chars=max(
+                1, int(os.getenv("MAX_TRANSCRIPT_CHARS", "8000").strip() or "8000")
+            ),
+            semantic_cache=os.getenv("SEMANTIC_CACHE", "").strip().lower() in ("1", "true", "yes"),
+            semantic_cache_threshold=float(
+                os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9").strip() or "0.9"
+            ),
         )
 
 
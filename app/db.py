@@ -2,18 +2,23 @@ from __future__ import annotations
 
 """
 SQLite data layer for the YouTube NLP analysis app.
+
+Writers do not commit; callers group them into one transaction with `with conn:`.
 """
 
 import sqlite3
 from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Iterable, Iterator, Optional
 
 from .config import Settings
 
 
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+
 @dataclass
 class VideoRecord:
     id: int
@@ -25,25 +30,48 @@ class VideoRecord:
     transcript_language: Optional[str]
 
 
-def _utc_now_iso() -> str:
-    return datetime.utcnow().isoformat(timespec="seconds")
+def utc_now_iso() -> str:
+    """
+    Current UTC time as a naive ISO-8601 string, the format used for `created_at`.
+
+    Batch writers compute this once and pass it to each row via `created_at`.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds")
 
 
 def get_connection(settings: Settings) -> sqlite3.Connection:
     """
-    Open a SQLite3 connection to the configured database path.
+    Open a SQLite3 connection to the configured database path, tuned for
+    this app's batch read/write workload.
     """
     db_path: Path = settings.database_path
     db_path.parent.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
+
+    # WAL lets readers proceed during writes; NORMAL sync drops the per-commit
+    # fsync. The rest keeps temp tables, the page cache (64 MB) and reads
+    # (256 MB mmap) in memory for the classification scan.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
     return conn
 
 
 def init_db(conn: sqlite3.Connection) -> None:
     """
     Ensure all tables exist.
+
+    Requires SQLite >= 3.35 for `INSERT ... RETURNING`.
     """
+    if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+        raise RuntimeError(
+            f"SQLite {'.'.join(map(str, MIN_SQLITE_VERSION))}+ is required, "
+            f"found {sqlite3.sqlite_version}."
+        )
+
     cursor = conn.cursor()
 
     cursor.execute(
@@ -88,6 +116,54 @@ def init_db(conn: sqlite3.Connection) -> None:
         """
     )
 
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            category TEXT NOT NULL,
+            rationale TEXT
+        );
+        """
+    )
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS classification_embeddings (
+            video_id INTEGER NOT NULL,
+            model TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            category TEXT NOT NULL,
+            rationale TEXT,
+            PRIMARY KEY (video_id, model),
+            FOREIGN KEY (video_id) REFERENCES videos (id) ON DELETE CASCADE
+        );
+        """
+    )
+
+    # Month bucket used by the analysis queries; generated so it is always in
+    # sync with published_at and can be indexed.
+    video_columns = {row["name"] for row in cursor.execute("PRAGMA table_xinfo(videos)")}
+    if "year_month" not in video_columns:
+        cursor.execute(
+            """
+            ALTER TABLE videos ADD COLUMN year_month TEXT
+            GENERATED ALWAYS AS (substr(published_at, 1, 7)) VIRTUAL
+            """
+        )
+
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_classifications_video_id ON classifications (video_id)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transcripts_video_id ON transcripts (video_id)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_videos_published_at ON videos (published_at)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_videos_year_month ON videos (year_month)"
+    )
+
     conn.commit()
 
 
@@ -97,6 +173,7 @@ def upsert_video(
     title: str,
     published_at: Optional[str],
     url: str,
+    created_at: Optional[str] = None,
 ) -> int:
     """
     Insert or update a video row and return its internal id.
@@ -110,21 +187,61 @@ def upsert_video(
             title = excluded.title,
             published_at = excluded.published_at,
             url = excluded.url
-        ;
+        RETURNING id
         """,
-        (youtube_id, title, published_at, url, _utc_now_iso()),
-    )
-    conn.commit()
-
-    cursor.execute(
-        "SELECT id FROM videos WHERE youtube_id = ?",
-        (youtube_id,),
+        (youtube_id, title, published_at, url, created_at or utc_now_iso()),
     )
     row = cursor.fetchone()
     assert row is not None
     return int(row["id"])
 
 
+_ID_LOOKUP_CHUNK = 500
+
+
+def upsert_videos(
+    conn: sqlite3.Connection,
+    videos: Iterable[tuple[str, str, Optional[str], str]],
+    created_at: Optional[str] = None,
+) -> dict[str, int]:
+    """
+    Batch variant of `upsert_video`.
+
+    Takes `(youtube_id, title, published_at, url)` tuples and returns a
+    mapping of youtube_id -> internal id.
+    """
+    created_at = created_at or utc_now_iso()
+    rows = [(*video, created_at) for video in videos]
+    if not rows:
+        return {}
+
+    cursor = conn.cursor()
+    cursor.executemany(
+        """
+        INSERT INTO videos (youtube_id, title, published_at, url, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(youtube_id) DO UPDATE SET
+            title = excluded.title,
+            published_at = excluded.published_at,
+            url = excluded.url
+        """,
+        rows,
+    )
+
+    # Look ids up in chunks to stay under SQLITE_MAX_VARIABLE_NUMBER.
+    youtube_ids = list(dict.fromkeys(row[0] for row in rows))
+    ids: dict[str, int] = {}
+    for start in range(0, len(youtube_ids), _ID_LOOKUP_CHUNK):
+        chunk = youtube_ids[start : start + _ID_LOOKUP_CHUNK]
+        placeholders = ", ".join("?" for _ in chunk)
+        cursor.execute(
+            f"SELECT id, youtube_id FROM videos WHERE youtube_id IN ({placeholders})",
+            chunk,
+        )
+        ids.update((row["youtube_id"], int(row["id"])) for row in cursor)
+    return ids
+
+
 def mark_transcript_status(
     conn: sqlite3.Connection,
     video_id: int,
@@ -140,7 +257,6 @@ def mark_transcript_status(
         """,
         (1 if has_transcript else 0, language, video_id),
     )
-    conn.commit()
 
 
 def store_transcript(
@@ -148,6 +264,7 @@ def store_transcript(
     video_id: int,
     text: str,
     is_auto_generated: bool,
+    created_at: Optional[str] = None,
 ) -> int:
     cursor = conn.cursor()
     cursor.execute(
@@ -155,12 +272,56 @@ def store_transcript(
         INSERT INTO transcripts (video_id, text, is_auto_generated, created_at)
         VALUES (?, ?, ?, ?)
         """,
-        (video_id, text, 1 if is_auto_generated else 0, _utc_now_iso()),
+        (video_id, text, 1 if is_auto_generated else 0, created_at or utc_now_iso()),
     )
-    conn.commit()
     return int(cursor.lastrowid)
 
 
+def mark_transcript_statuses_bulk(
+    conn: sqlite3.Connection,
+    rows: Iterable[tuple[int, bool, Optional[str]]],
+) -> None:
+    """
+    Batch variant of `mark_transcript_status`.
+
+    Takes `(video_id, has_transcript, language)` tuples.
+    """
+    cursor = conn.cursor()
+    cursor.executemany(
+        """
+        UPDATE videos
+        SET has_transcript = ?, transcript_language = ?
+        WHERE id = ?
+        """,
+        (
+            (1 if has_transcript else 0, language, video_id)
+            for video_id, has_transcript, language in rows
+        ),
+    )
+
+
+def store_transcripts_bulk(
+    conn: sqlite3.Connection,
+    rows: Iterable[tuple[int, str, bool, str]],
+) -> None:
+    """
+    Batch variant of `store_transcript`.
+
+    Takes `(video_id, text, is_auto_generated, created_at)` tuples.
+    """
+    cursor = conn.cursor()
+    cursor.executemany(
+        """
+        INSERT INTO transcripts (video_id, text, is_auto_generated, created_at)
+        VALUES (?, ?, ?, ?)
+        """,
+        (
+            (video_id, text, 1 if is_auto_generated else 0, created_at)
+            for video_id, text, is_auto_generated, created_at in rows
+        ),
+    )
+
+
 def video_has_transcript(conn: sqlite3.Connection, video_id: int) -> bool:
     cursor = conn.cursor()
     cursor.execute(
@@ -171,6 +332,15 @@ def video_has_transcript(conn: sqlite3.Connection, video_id: int) -> bool:
     return bool(row and row["has_transcript"])
 
 
+def get_youtube_ids_with_transcript(conn: sqlite3.Connection) -> set[str]:
+    """
+    Return the YouTube ids of every video that already has a stored transcript.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT youtube_id FROM videos WHERE has_transcript = 1")
+    return {row["youtube_id"] for row in cursor}
+
+
 def iter_unclassified_transcripts(conn: sqlite3.Connection) -> Iterable[sqlite3.Row]:
     """
     Yield transcripts that do not yet have a classification row.
@@ -193,8 +363,8 @@ def iter_unclassified_transcripts(conn: sqlite3.Connection) -> Iterable[sqlite3.
         ORDER BY v.published_at IS NULL, v.published_at
         """
     )
-    for row in cursor.fetchall():
-        yield row
+    cursor.arraysize = 64
+    yield from cursor
 
 
 def store_classification(
@@ -203,6 +373,7 @@ def store_classification(
     category: str,
     model: str,
     rationale: Optional[str],
+    created_at: Optional[str] = None,
 ) -> int:
     cursor = conn.cursor()
     cursor.execute(
@@ -210,12 +381,94 @@ def store_classification(
         INSERT INTO classifications (video_id, category, model, rationale, created_at)
         VALUES (?, ?, ?, ?, ?)
         """,
-        (video_id, category, model, rationale, _utc_now_iso()),
+        (video_id, category, model, rationale, created_at or utc_now_iso()),
     )
-    conn.commit()
     return int(cursor.lastrowid)
 
 
+def store_classifications_bulk(
+    conn: sqlite3.Connection,
+    rows: Iterable[tuple[int, str, str, Optional[str], str]],
+) -> None:
+    """
+    Batch variant of `store_classification`.
+
+    Takes `(video_id, category, model, rationale, created_at)` tuples.
+    """
+    cursor = conn.cursor()
+    cursor.executemany(
+        """
+        INSERT INTO classifications (video_id, category, model, rationale, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+
+
+def get_cached_classification(conn: sqlite3.Connection, key: str) -> Optional[sqlite3.Row]:
+    """
+    Look up a cached LLM classification by its content-hash key.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT category, rationale FROM llm_cache WHERE key = ?",
+        (key,),
+    )
+    return cursor.fetchone()
+
+
+def store_cached_classification(
+    conn: sqlite3.Connection,
+    key: str,
+    category: str,
+    rationale: Optional[str],
+) -> None:
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        INSERT OR IGNORE INTO llm_cache (key, category, rationale)
+        VALUES (?, ?, ?)
+        """,
+        (key, category, rationale),
+    )
+
+
+def get_classification_embeddings(conn: sqlite3.Connection, model: str) -> list[sqlite3.Row]:
+    """
+    Return every stored transcript embedding (float32 bytes) and label for `model`.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT video_id, embedding, category, rationale
+        FROM classification_embeddings
+        WHERE model = ?
+        ORDER BY video_id
+        """,
+        (model,),
+    )
+    return cursor.fetchall()
+
+
+def store_classification_embedding(
+    conn: sqlite3.Connection,
+    video_id: int,
+    model: str,
+    embedding: bytes,
+    category: str,
+    rationale: Optional[str],
+) -> None:
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        INSERT OR REPLACE INTO classification_embeddings
+            (video_id, model, embedding, category, rationale)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (video_id, model, embedding, category, rationale),
+    )
+
+
 def get_category_counts(conn: sqlite3.Connection) -> list[sqlite3.Row]:
     cursor = conn.cursor()
     cursor.execute(
@@ -237,14 +490,52 @@ def get_category_counts_by_month(conn: sqlite3.Connection) -> list[sqlite3.Row]:
     cursor.execute(
         """
         SELECT
-            substr(v.published_at, 1, 7) AS year_month,
+            v.year_month,
             c.category,
             COUNT(*) AS count
         FROM classifications c
         JOIN videos v ON v.id = c.video_id
-        WHERE v.published_at IS NOT NULL
-        GROUP BY year_month, c.category
-        ORDER BY year_month, c.category
+        WHERE v.year_month IS NOT NULL
+        GROUP BY v.year_month, c.category
+        ORDER BY v.year_month, c.category
+        """
+    )
+    return cursor.fetchall()
+
+
+def get_category_count_summary(conn: sqlite3.Connection) -> list[sqlite3.Row]:
+    """
+    Overall and per-month category counts in a single query.
+
+    Rows with `section` 0 are overall totals (ordered by count, descending);
+    rows with `section` 1 are per YYYY-MM buckets (ordered by month, category).
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT
+            0 AS section,
+            NULL AS year_month,
+            category,
+            COUNT(*) AS count,
+            -COUNT(*) AS sort_key
+        FROM classifications
+        GROUP BY category
+
+        UNION ALL
+
+        SELECT
+            1 AS section,
+            v.year_month,
+            c.category,
+            COUNT(*) AS count,
+            0 AS sort_key
+        FROM classifications c
+        JOIN videos v ON v.id = c.video_id
+        WHERE v.year_month IS NOT NULL
+        GROUP BY v.year_month, c.category
+
+        ORDER BY section, year_month, sort_key, category
         """
     )
     return cursor.fetchall()
@@ -259,6 +550,8 @@ def open_db(settings: Settings) -> Iterator[sqlite3.Connection]:
     try:
         init_db(conn)
         yield conn
+        # Let SQLite refresh planner statistics for the indexes it used.
+        conn.execute("PRAGMA optimize")
     finally:
         conn.close()
 
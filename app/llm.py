@@ -7,8 +7,13 @@ Pydantic AI model configuration for Ollama and OpenAI backends.
 import os
 from typing import Type
 
+import httpx
 from pydantic import BaseModel
 from pydantic_ai import Agent
+from pydantic_ai.models import infer_model
+from pydantic_ai.providers import infer_provider
+from pydantic_ai.providers.ollama import OllamaProvider
+from pydantic_ai.providers.openai import OpenAIProvider
 
 from .config import Settings
 
@@ -28,21 +33,52 @@ def _get_model_string(settings: Settings) -> str:
     return f"ollama:{settings.ollama_model}"
 
 
-def build_agent(settings: Settings, output_type: Type[BaseModel], system_prompt: str) -> Agent:
+def build_http_client(settings: Settings) -> httpx.AsyncClient:
+    """
+    Create a pooled async HTTP client sized for the classifier's concurrency.
+
+    Sharing one client across all agent runs keeps connections to the model
+    server alive instead of re-establishing them per request.
+    """
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(600, connect=5),
+        limits=httpx.Limits(
+            max_connections=settings.llm_concurrency,
+            max_keepalive_connections=settings.llm_concurrency,
+        ),
+    )
+
+
+def build_agent(
+    settings: Settings,
+    output_type: Type[BaseModel],
+    system_prompt: str,
+    http_client: httpx.AsyncClient | None = None,
+) -> Agent:
     """
     Construct a Pydantic AI Agent for structured outputs.
     
     The Agent accepts a string model identifier in the format "provider:model_name".
+    When `http_client` is given, the provider sends all requests through it.
     """
-    from pydantic_ai.models import infer_model
-    from pydantic_ai.providers import infer_provider
-    
     # Ensure OLLAMA_BASE_URL is set before getting model string (which may use Ollama)
     if settings.llm_provider.lower() != "openai":
         if "OLLAMA_BASE_URL" not in os.environ:
             os.environ["OLLAMA_BASE_URL"] = settings.ollama_base_url
     
     model_string = _get_model_string(settings)
+
+    if http_client is not None:
+        if settings.llm_provider.lower() == "openai":
+            provider = OpenAIProvider(api_key=settings.openai_api_key, http_client=http_client)
+        else:
+            provider = OllamaProvider(base_url=settings.ollama_base_url, http_client=http_client)
+        model = infer_model(model_string, provider_factory=lambda _: provider)
+        return Agent(
+            model=model,
+            output_type=output_type,
+            system_prompt=system_prompt,
+        )
     
     # For Ollama, we need to explicitly pass the provider factory
     # because infer_model doesn't correctly parse "ollama:model_name" format
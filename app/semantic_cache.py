@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+"""
+Optional embedding-similarity cache for transcript classifications.
+
+Transcripts whose opening is close enough (cosine similarity) to an already
+classified transcript reuse that label instead of calling the LLM. Requires
+the `semantic` extra: `sentence-transformers` and `numpy`.
+"""
+
+from typing import Optional
+
+from . import db
+
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Only the opening of each transcript is embedded.
+EMBED_CHARS = 4000
+
+
+class SemanticCache:
+    """
+    In-memory index of normalized transcript embeddings and their labels,
+    loaded from the `classification_embeddings` table for one LLM model.
+    """
+
+    def __init__(self, conn, model_name: str, threshold: float) -> None:
+        try:
+            import numpy as np
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError(
+                "SEMANTIC_CACHE requires the `semantic` extra "
+                "(sentence-transformers, numpy). Install it with `uv sync --extra semantic`."
+            ) from e
+
+        self._np = np
+        self._encoder = SentenceTransformer(EMBEDDING_MODEL)
+        self.model_name = model_name
+        self.threshold = threshold
+
+        rows = db.get_classification_embeddings(conn, model_name)
+        dim = self._encoder.get_sentence_embedding_dimension()
+        self._labels: list[tuple[str, Optional[str]]] = [
+            (row["category"], row["rationale"]) for row in rows
+        ]
+        self._index = np.frombuffer(
+            b"".join(row["embedding"] for row in rows), dtype=np.float32
+        ).reshape(len(rows), dim)
+
+    def embed(self, texts: list[str]):
+        """
+        Embed the opening of each transcript as a normalized float32 matrix.
+        """
+        embeddings = self._encoder.encode(
+            [text[:EMBED_CHARS] for text in texts],
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        )
+        return embeddings.astype(self._np.float32, copy=False)
+
+    def match(self, embeddings) -> list[Optional[tuple[str, Optional[str]]]]:
+        """
+        Return the `(category, rationale)` of the nearest cached transcript for
+        each embedding, or None where the best similarity is below threshold.
+        """
+        if not self._labels:
+            return [None] * len(embeddings)
+
+        # Embeddings are normalized, so one matmul gives all cosine similarities.
+        scores = embeddings @ self._index.T
+        best = scores.argmax(axis=1)
+        return [
+            self._labels[j] if scores[i, j] >= self.threshold else None
+            for i, j in enumerate(best)
+        ]
+
+    def store(
+        self,
+        conn,
+        video_id: int,
+        embedding,
+        category: str,
+        rationale: Optional[str],
+    ) -> None:
+        db.store_classification_embedding(
+            conn=conn,
+            video_id=video_id,
+            model=self.model_name,
+            embedding=embedding.tobytes(),
+            category=category,
+            rationale=rationale,
+        )
@@ -4,49 +4,337 @@ from __future__ import annotations
 Transcript discovery and download using `yt_dlp`.
 """
 
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Optional, Tuple
-import tempfile
+from typing import Iterator, Optional, Tuple
+import atexit
+import io
+import queue
+import threading
 import time
-import random
 
 import yt_dlp
+from rich.console import Console
 
 from .config import Settings
 from . import db
 from .youtube_client import ChannelVideo
 
 
-@dataclass
+console = Console()
+
+
+@dataclass(frozen=True)
 class TranscriptResult:
     text: Optional[str]
     language: Optional[str]
     is_auto_generated: bool
 
 
-def _parse_vtt_to_text(vtt_path: Path) -> str:
+def _parse_vtt_to_text(vtt: str | Path) -> str:
     """
     Very small VTT -> plain text converter: drops timestamps and headers.
+
+    Accepts either the VTT content itself or a path to a `.vtt` file, which is
+    streamed line by line. Consecutive duplicate lines (auto-captions repeat
+    each cue as it scrolls) are collapsed.
+    """
+    out = io.StringIO()
+    prev: Optional[str] = None
+    if isinstance(vtt, Path):
+        source = open(vtt, "r", encoding="utf-8", errors="ignore")
+    else:
+        source = io.StringIO(vtt)
+    with source:
+        for raw_line in source:
+            line = raw_line.strip()
+            # Blank, repeated, timestamp, header and cue-index lines carry no
+            # new text. Cheapest checks first; `isdigit()` only runs on lines
+            # that start with a digit.
+            if (
+                not line
+                or line == prev
+                or "-->" in line
+                or line.startswith("WEBVTT")
+                or (line[0].isdigit() and line.isdigit())
+            ):
+                continue
+            if prev is not None:
+                out.write("\n")
+            out.write(line)
+            prev = line
+    return out.getvalue()
+
+
+@dataclass(frozen=True)
+class FetchOptions:
+    """
+    yt-dlp tuning for transcript fetches. Frozen so it can key both the
+    YoutubeDL pool and the per-URL memo cache.
+    """
+
+    # Seconds yt-dlp sleeps between the requests it makes while extracting.
+    sleep_requests: float = 0.0
+    # Seconds to sleep before each subtitle track download.
+    sleep_subtitles: float = 0.0
+    # Cookie file and on-disk player JS / signature cache (None keeps
+    # yt-dlp's defaults). Each pooled YoutubeDL loads its own cookie jar from
+    # the same file and writes it back when the pool is closed.
+    cookie_file: Optional[Path] = None
+    cache_dir: Optional[Path] = None
+    # Global cap on request starts per second across all workers, applied to
+    # every attempt including 429 retries (None disables pacing).
+    requests_per_sec: Optional[float] = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "FetchOptions":
+        return cls(
+            sleep_requests=settings.ytdlp_sleep_requests,
+            sleep_subtitles=settings.ytdlp_sleep_subtitles,
+            cookie_file=settings.ytdlp_cookie_file,
+            cache_dir=settings.ytdlp_cache_dir,
+            requests_per_sec=settings.transcript_requests_per_sec,
+        )
+
+    def ydl_params(self) -> dict:
+        params = {
+            "skip_download": True,
+            "quiet": True,
+            # Our own backoff in fetch_transcript_for_video is the only retry
+            # point, so yt-dlp cannot amplify requests during a 429 storm.
+            "retries": 0,
+            "extractor_retries": 0,
+            "sleep_interval_requests": self.sleep_requests,
+        }
+        if self.cookie_file is not None:
+            params["cookiefile"] = str(self.cookie_file)
+        if self.cache_dir is not None:
+            params["cachedir"] = str(self.cache_dir)
+        return params
+
+
+# YoutubeDL instances are not thread-safe, so each is used by one thread at a
+# time. Idle instances, with their HTTP sessions and extractor state, are kept
+# in process-wide pools (one per FetchOptions) and reused across videos until
+# `_close_ydl_pools` runs at the end of an extraction (or at exit).
+_ydl_pools: dict[FetchOptions, queue.SimpleQueue] = {}
+
+
+@contextmanager
+def _borrow_ydl(options: FetchOptions) -> Iterator[yt_dlp.YoutubeDL]:
+    pool = _ydl_pools.setdefault(options, queue.SimpleQueue())
+    try:
+        ydl = pool.get_nowait()
+    except queue.Empty:
+        ydl = yt_dlp.YoutubeDL(options.ydl_params())
+    try:
+        yield ydl
+    finally:
+        pool.put(ydl)
+
+
+def _close_ydl_pools() -> None:
+    """
+    Close every idle pooled YoutubeDL, which saves its cookies back to the
+    cookie file and releases its HTTP sessions.
+    """
+    for pool in list(_ydl_pools.values()):
+        while True:
+            try:
+                ydl = pool.get_nowait()
+            except queue.Empty:
+                break
+            ydl.close()
+
+
+@contextmanager
+def _closing_ydl_pools() -> Iterator[None]:
+    try:
+        yield
+    finally:
+        _close_ydl_pools()
+
+
+# Instances used outside an extraction (direct `fetch_transcript_for_video`
+# calls) are closed at exit.
+atexit.register(_close_ydl_pools)
+
+
+def _pick_vtt_url(tracks: Optional[dict], lang: str = "en") -> Optional[str]:
     """
-    lines: list[str] = []
-    for raw_line in vtt_path.read_text(encoding="utf-8", errors="ignore").splitlines():
-        line = raw_line.strip()
-        if not line:
-            continue
-        if line.startswith("WEBVTT"):
-            continue
-        if "-->" in line:
-            # timestamp line
-            continue
-        # cue index (e.g. "1", "2") – drop if it is just a number
-        if line.isdigit():
-            continue
-        lines.append(line)
-    return "\n".join(lines)
-
-
-def fetch_transcript_for_video(url: str) -> TranscriptResult:
+    Return the URL of the VTT rendition for `lang` in a yt-dlp subtitle map.
+    """
+    for track in (tracks or {}).get(lang) or []:
+        if track.get("ext") == "vtt" and track.get("url"):
+            return track["url"]
+    return None
+
+
+class _RateLimitCooldown:
+    """
+    Process-wide HTTP 429 cooldown shared by every transcript worker.
+
+    Once any request is rate limited, all workers pause until the cooldown
+    expires. The delay honours `Retry-After` when YouTube sends it, and
+    otherwise doubles with each consecutive 429 (60s, 120s, ... up to 1h).
+
+    `cancel()` wakes every waiting worker at once and makes further fetch
+    attempts give up, so an aborted extraction does not sit out the cooldown.
+    """
+
+    def __init__(self, max_delay: float = 3600.0) -> None:
+        self._until = 0.0
+        self._consecutive = 0
+        self._max_delay = max_delay
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def resume(self) -> None:
+        self._cancelled.clear()
+
+    def wait(self) -> None:
+        # Re-check the deadline after sleeping: another worker may have
+        # extended the cooldown in the meantime.
+        while not self._cancelled.is_set():
+            with self._lock:
+                remaining = self._until - time.monotonic()
+            if remaining <= 0:
+                return
+            self._cancelled.wait(remaining)
+
+    def trip(self, retry_after: Optional[float]) -> None:
+        with self._lock:
+            now = time.monotonic()
+            # 429s from requests already in flight when the cooldown started
+            # belong to the same burst: keep the current deadline and backoff.
+            if now < self._until:
+                return
+            if retry_after is None:
+                retry_after = min(self._max_delay, 60.0 * 2 ** self._consecutive)
+            self._consecutive += 1
+            self._until = now + retry_after
+
+    def reset(self) -> None:
+        with self._lock:
+            self._consecutive = 0
+
+
+_cooldown = _RateLimitCooldown()
+
+
+class _RateLimiter:
+    """
+    Global pacing for transcript requests: request starts are spaced at least
+    `1 / rate` seconds apart across all worker threads.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self._interval = 1.0 / rate
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._interval
+        if start > now:
+            time.sleep(start - now)
+
+
+_rate_limiters: dict[float, _RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def _get_rate_limiter(rate: float) -> _RateLimiter:
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(rate)
+        if limiter is None:
+            limiter = _rate_limiters[rate] = _RateLimiter(rate)
+        return limiter
+
+
+def _retry_after_seconds(exc: Optional[BaseException]) -> Optional[float]:
+    """
+    Return the `Retry-After` delay in seconds carried by a yt-dlp error chain.
+    """
+    seen: set[int] = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        headers = getattr(getattr(exc, "response", None), "headers", None)
+        value = headers.get("Retry-After") if headers else None
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(value)
+                except (TypeError, ValueError):
+                    return None
+                return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+        # DownloadError keeps the underlying network error in exc_info.
+        exc_info = getattr(exc, "exc_info", None)
+        exc = (exc_info[1] if exc_info else None) or exc.__cause__ or exc.__context__
+    return None
+
+
+def _fetch_once(url: str, options: FetchOptions) -> TranscriptResult:
+    with _borrow_ydl(options) as ydl:
+        info = ydl.extract_info(url, download=False)
+        if not info:
+            return TranscriptResult(text=None, language=None, is_auto_generated=False)
+
+        # Manual subtitles first, then auto-generated captions.
+        for is_auto, tracks in (
+            (False, info.get("subtitles")),
+            (True, info.get("automatic_captions")),
+        ):
+            vtt_url = _pick_vtt_url(tracks)
+            if vtt_url is None:
+                continue
+            if options.sleep_subtitles:
+                time.sleep(options.sleep_subtitles)
+            with ydl.urlopen(vtt_url) as response:
+                vtt = response.read().decode("utf-8", errors="ignore")
+            text = _parse_vtt_to_text(vtt)
+            if text:
+                return TranscriptResult(text=text, language="en", is_auto_generated=is_auto)
+
+    return TranscriptResult(text=None, language=None, is_auto_generated=True)
+
+
+# Successful fetches kept in memory; failures are never cached so a later
+# call retries them.
+_TRANSCRIPT_CACHE_SIZE = 64
+_transcript_cache: OrderedDict[tuple, TranscriptResult] = OrderedDict()
+_transcript_cache_lock = threading.Lock()
+
+
+def clear_transcript_cache() -> None:
+    """
+    Forget all memoized transcripts.
+    """
+    with _transcript_cache_lock:
+        _transcript_cache.clear()
+
+
+def fetch_transcript_for_video(
+    url: str,
+    options: FetchOptions = FetchOptions(),
+    max_retries: int = 3,
+) -> TranscriptResult:
     """
     Attempt to download subtitles for a single video as text.
 
@@ -54,67 +342,69 @@ def fetch_transcript_for_video(url: str) -> TranscriptResult:
       1. Manually provided subtitles in English.
       2. Automatically generated subtitles in English.
 
+    The video's metadata is extracted once and the chosen VTT track is fetched
+    and parsed in memory. HTTP 429 (Too Many Requests) trips a cooldown shared
+    by all workers (see `_RateLimitCooldown`) before the request is retried.
+
+    The most recent successful results are memoized per URL; use
+    `clear_transcript_cache()` to reset.
+
     If nothing can be downloaded, returns TranscriptResult with text=None.
     """
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmpdir_path = Path(tmpdir)
+    key = (url, options)
+    with _transcript_cache_lock:
+        cached = _transcript_cache.get(key)
+        if cached is not None:
+            _transcript_cache.move_to_end(key)
+            return cached
 
-        # First try manual subtitles.
-        base_opts = {
-            "skip_download": True,
-            "quiet": True,
-            "writesubtitles": True,
-            "writeautomaticsub": False,
-            "subtitlesformat": "vtt",
-            "subtitleslangs": ["en"],
-            "outtmpl": str(tmpdir_path / "%(id)s.%(ext)s"),
-        }
+    result = _fetch_with_retries(url, options, max_retries)
+    if result.text is not None:
+        with _transcript_cache_lock:
+            _transcript_cache[key] = result
+            _transcript_cache.move_to_end(key)
+            while len(_transcript_cache) > _TRANSCRIPT_CACHE_SIZE:
+                _transcript_cache.popitem(last=False)
+    return result
+
+
+def _fetch_with_retries(
+    url: str,
+    options: FetchOptions,
+    max_retries: int,
+) -> TranscriptResult:
+    limiter = None
+    if options.requests_per_sec:
+        limiter = _get_rate_limiter(options.requests_per_sec)
+    for _ in range(max_retries):
+        _cooldown.wait()
+        # Pace every attempt, so workers released by a cooldown do not burst.
+        if limiter is not None:
+            limiter.wait()
+        # Extraction aborted: give up without sending another request.
+        if _cooldown.cancelled:
+            break
+        try:
+            result = _fetch_once(url, options)
+        except yt_dlp.utils.YoutubeDLError as e:
+            error_msg = str(e)
+            # Check if it's a 429 rate limit error
+            if "429" in error_msg or "Too Many Requests" in error_msg:
+                _cooldown.trip(_retry_after_seconds(e))
+                continue
+            # For other errors, return None immediately
+            return TranscriptResult(text=None, language=None, is_auto_generated=False)
+        except Exception:
+            # For any other exception, return None
+            return TranscriptResult(text=None, language=None, is_auto_generated=False)
+        _cooldown.reset()
+        return result
+
+    return TranscriptResult(text=None, language=None, is_auto_generated=False)
 
-        def _try_download(opts, is_auto: bool, max_retries: int = 3) -> TranscriptResult:
-            """
-            Try to download transcript with retry logic for rate limiting.
-            
-            Handles HTTP 429 (Too Many Requests) with exponential backoff.
-            """
-            for attempt in range(max_retries):
-                try:
-                    with yt_dlp.YoutubeDL(opts) as ydl:
-                        ydl.extract_info(url, download=True)
-                    vtt_files = list(tmpdir_path.glob("*.vtt"))
-                    if not vtt_files:
-                        return TranscriptResult(text=None, language=None, is_auto_generated=is_auto)
-                    text = _parse_vtt_to_text(vtt_files[0])
-                    lang = "en"
-                    return TranscriptResult(text=text, language=lang, is_auto_generated=is_auto)
-                except yt_dlp.utils.DownloadError as e:
-                    error_msg = str(e)
-                    # Check if it's a 429 rate limit error
-                    if "429" in error_msg or "Too Many Requests" in error_msg:
-                        if attempt < max_retries - 1:
-                            # Exponential backoff: 2^attempt seconds, with jitter
-                            wait_time = (2 ** attempt) + random.uniform(0, 1)
-                            time.sleep(wait_time)
-                            continue
-                        # If we've exhausted retries, return None
-                        return TranscriptResult(text=None, language=None, is_auto_generated=is_auto)
-                    # For other errors, return None immediately
-                    return TranscriptResult(text=None, language=None, is_auto_generated=is_auto)
-                except Exception:
-                    # For any other exception, return None
-                    return TranscriptResult(text=None, language=None, is_auto_generated=is_auto)
-            
-            return TranscriptResult(text=None, language=None, is_auto_generated=is_auto)
-
-        manual = _try_download(base_opts, is_auto=False)
-        if manual.text:
-            return manual
-
-        # Fallback to auto-generated captions.
-        auto_opts = dict(base_opts)
-        auto_opts["writesubtitles"] = False
-        auto_opts["writeautomaticsub"] = True
-        auto = _try_download(auto_opts, is_auto=True)
-        return auto
+
+# Number of fetched videos written per transaction during extraction.
+WRITE_BATCH_SIZE = 32
 
 
 def extract_channel_videos_and_transcripts(
@@ -125,68 +415,98 @@ def extract_channel_videos_and_transcripts(
     """
     Given a list of videos for a channel, ensure they are present in the DB
     and that their transcript status is recorded.
+
+    Transcripts are fetched concurrently on a thread pool of
+    `settings.transcript_workers` threads; all DB writes stay on the calling
+    thread since the SQLite connection is not shared across threads. Results
+    are written in short transactions every `WRITE_BATCH_SIZE` videos while the
+    remaining fetches are still in flight.
     
-    Includes rate limiting with delays between requests to avoid hitting
-    YouTube's rate limits (HTTP 429 errors).
+    Request starts are globally limited to `settings.transcript_requests_per_sec`
+    to avoid hitting YouTube's rate limits (HTTP 429 errors).
     """
-    from rich.console import Console
-    
-    console = Console()
     total = len(videos)
-    processed = 0
     transcripts_found = 0
     transcripts_missing = 0
     
-    for idx, video in enumerate(videos, 1):
-        video_id = db.upsert_video(
-            conn=conn,
-            youtube_id=video.youtube_id,
-            title=video.title,
-            published_at=video.published_at,
-            url=video.url,
+    with conn:
+        video_ids = db.upsert_videos(
+            conn,
+            [(v.youtube_id, v.title, v.published_at, v.url) for v in videos],
         )
+        already_have = db.get_youtube_ids_with_transcript(conn)
 
-        if db.video_has_transcript(conn, video_id):
-            processed += 1
-            continue
-
-        # Add delay between requests to avoid rate limiting
-        # Random delay between 1-3 seconds to avoid predictable patterns
-        if idx > 1:  # Don't delay before the first request
-            delay = random.uniform(1.0, 3.0)
-            time.sleep(delay)
-
-        console.print(f"[dim]Processing video {idx}/{total}: {video.title[:50]}...[/dim]")
-        
-        result = fetch_transcript_for_video(video.url)
-        if result.text:
-            db.store_transcript(
-                conn=conn,
-                video_id=video_id,
-                text=result.text,
-                is_auto_generated=result.is_auto_generated,
-            )
-            db.mark_transcript_status(
-                conn=conn,
-                video_id=video_id,
-                has_transcript=True,
-                language=result.language,
-            )
-            transcripts_found += 1
-        else:
-            db.mark_transcript_status(
-                conn=conn,
-                video_id=video_id,
-                has_transcript=False,
-                language=None,
+    # De-duplicate by youtube_id so a repeated entry is fetched only once.
+    unique = {v.youtube_id: v for v in videos}
+    pending = [v for v in unique.values() if v.youtube_id not in already_have]
+    processed = total - len(pending)
+
+    options = FetchOptions.from_settings(settings)
+    _cooldown.resume()
+
+    # Rows for the next batch write: (video_id, text, is_auto) and
+    # (video_id, has_transcript, language).
+    transcript_rows: list[tuple] = []
+    status_rows: list[tuple] = []
+
+    def flush() -> None:
+        # One short write transaction; no write lock is held during network I/O.
+        with conn:
+            # Stamp each batch when it is written, not when extraction started.
+            created_at = db.utc_now_iso()
+            db.store_transcripts_bulk(
+                conn, [(*row, created_at) for row in transcript_rows]
             )
-            transcripts_missing += 1
-        
-        processed += 1
-    
+            db.mark_transcript_statuses_bulk(conn, status_rows)
+        transcript_rows.clear()
+        status_rows.clear()
+
+    # Entered outermost so the executor joins its workers before the pooled
+    # YoutubeDL instances are closed (which saves cookies to the cookie file).
+    with _closing_ydl_pools(), ThreadPoolExecutor(
+        max_workers=settings.transcript_workers
+    ) as executor:
+        futures = {
+            executor.submit(fetch_transcript_for_video, v.url, options): v
+            for v in pending
+        }
+
+        try:
+            for idx, future in enumerate(as_completed(futures), 1):
+                video = futures[future]
+                result = future.result()
+                console.print(
+                    f"[dim]Fetched video {idx}/{len(pending)}: {video.title[:50]}...[/dim]"
+                )
+
+                video_id = video_ids[video.youtube_id]
+                if result.text:
+                    transcript_rows.append(
+                        (video_id, result.text, result.is_auto_generated)
+                    )
+                    status_rows.append((video_id, True, result.language))
+                    transcripts_found += 1
+                else:
+                    status_rows.append((video_id, False, None))
+                    transcripts_missing += 1
+
+                processed += 1
+                if len(status_rows) >= WRITE_BATCH_SIZE:
+                    flush()
+        except BaseException:
+            # On error or Ctrl-C, drop queued fetches and wake workers sleeping
+            # out a cooldown instead of waiting for the whole channel, and keep
+            # what has been collected so far.
+            _cooldown.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            if status_rows:
+                flush()
+            raise
+
+    if status_rows:
+        flush()
+
     console.print(
         f"[green]Processed {processed}/{total} videos. "
         f"Transcripts found: {transcripts_found}, Missing: {transcripts_missing}[/green]"
     )
-
-
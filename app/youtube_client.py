@@ -5,7 +5,7 @@ Thin wrapper around `yt_dlp` to list videos for a channel.
 """
 
 from dataclasses import dataclass
-from datetime import datetime
+from pathlib import Path
 from typing import List, Optional
 
 import yt_dlp
@@ -22,60 +22,81 @@ class ChannelVideo:
 def _normalize_upload_date(upload_date: Optional[str]) -> Optional[str]:
     """
     Convert YouTube's YYYYMMDD upload_date string to ISO YYYY-MM-DD.
+
+    The input is fixed-width, so slicing replaces `strptime`; month and day
+    are range-checked.
     """
-    if not upload_date:
+    if (
+        not upload_date
+        or len(upload_date) != 8
+        or not (upload_date.isascii() and upload_date.isdigit())
+    ):
         return None
-    try:
-        dt = datetime.strptime(upload_date, "%Y%m%d")
-        return dt.date().isoformat()
-    except Exception:
+    year, month, day = upload_date[:4], upload_date[4:6], upload_date[6:]
+    if not ("01" <= month <= "12" and "01" <= day <= "31"):
         return None
+    return f"{year}-{month}-{day}"
 
 
 def _extract_videos_from_entries(entries: list, videos: List[ChannelVideo]) -> None:
     """
-    Recursively extract video entries from a potentially nested entries structure.
+    Extract video entries from a potentially nested entries structure.
     Handles channels that have sections (Videos, Live, Shorts) with nested entries.
+
+    Walks the tree with an explicit stack of iterators, so order is preserved
+    and arbitrarily deep nesting cannot hit the recursion limit.
     """
-    for entry in entries:
+    append = videos.append
+    done = object()
+    stack = [iter(entries)]
+    while stack:
+        entry = next(stack[-1], done)
+        if entry is done:
+            stack.pop()
+            continue
         if not entry:
             continue
-        
-        # If this entry has nested entries (like a playlist/section), recurse
-        if entry.get("entries"):
-            _extract_videos_from_entries(entry.get("entries"), videos)
+
+        get = entry.get
+
+        # If this entry has nested entries (like a playlist/section), descend
+        nested = get("entries")
+        if nested:
+            stack.append(iter(nested))
             continue
-        
+
         # Extract video information
-        video_id = entry.get("id")
+        video_id, title, upload_date, url = (
+            get("id"),
+            get("title") or "",
+            get("upload_date"),
+            get("url") or get("webpage_url"),
+        )
         if not video_id:
             # Try to extract from URL
-            url = entry.get("url") or entry.get("webpage_url") or ""
-            if "watch?v=" in url:
+            if url and "watch?v=" in url:
                 video_id = url.split("watch?v=")[-1].split("&")[0].split("/")[0]
             else:
                 continue
-        
-        title = entry.get("title") or ""
-        upload_date = _normalize_upload_date(entry.get("upload_date"))
-        
-        # Construct URL if not present
-        if not entry.get("url") and not entry.get("webpage_url"):
-            url = f"https://www.youtube.com/watch?v={video_id}"
-        else:
-            url = entry.get("url") or entry.get("webpage_url")
-
-        videos.append(
+
+        append(
             ChannelVideo(
                 youtube_id=video_id,
                 title=title,
-                url=url,
-                published_at=upload_date,
+                # Construct URL if not present
+                url=url or f"https://www.youtube.com/watch?v={video_id}",
+                published_at=_normalize_upload_date(upload_date),
             )
         )
 
 
-def list_channel_videos(channel_url: str, max_videos: int = 10) -> List[ChannelVideo]:
+def list_channel_videos(
+    channel_url: str,
+    max_videos: int = 10,
+    eager_metadata: bool = False,
+    cookie_file: Optional[Path] = None,
+    cache_dir: Optional[Path] = None,
+) -> List[ChannelVideo]:
     """
     Return basic metadata for videos in a channel.
     
@@ -89,6 +110,10 @@ def list_channel_videos(channel_url: str, max_videos: int = 10) -> List[ChannelV
     Args:
         channel_url: URL of the YouTube channel
         max_videos: Maximum number of videos to extract (default: 10)
+        eager_metadata: Fully extract every video so that upload dates are
+            known up front (one extra request per video; default: False)
+        cookie_file: Netscape cookie file to send with requests
+        cache_dir: yt-dlp cache directory (player JS, signature solutions)
     """
     # Convert channel handle to videos URL if needed
     if channel_url.startswith("https://www.youtube.com/@") and "/videos" not in channel_url:
@@ -98,14 +123,20 @@ def list_channel_videos(channel_url: str, max_videos: int = 10) -> List[ChannelV
         "ignoreerrors": True,
         "quiet": True,
         "skip_download": True,
-        # Use extract_flat=True to avoid SABR streaming format extraction warnings
-        # This gets basic metadata (id, title, url) without extracting video formats
-        # Note: upload_date will be None with extract_flat=True, but this avoids
-        # the "missing url" warnings about web_safari/web client formats
-        "extract_flat": True,
+        # Flat extraction gets basic metadata (id, title, url) without
+        # extracting video formats, which avoids the SABR "missing url"
+        # warnings; upload_date is usually None in this mode. "in_playlist"
+        # behaves like True for channel tabs, except that a top-level url
+        # result (e.g. a handle redirect) is still resolved.
+        "extract_flat": False if eager_metadata else "in_playlist",
         "no_warnings": False,
     }
     
+    if cookie_file is not None:
+        ydl_opts["cookiefile"] = str(cookie_file)
+    if cache_dir is not None:
+        ydl_opts["cachedir"] = str(cache_dir)
+
     # Limit to max_videos if specified
     if max_videos is not None:
         ydl_opts["playlistend"] = max_videos